@@ -1,7 +1,19 @@
+import argparse
 import sys
+import numpy
+
+import inflammation_output
+
+# the NumPy function that applies each operator to whole arrays at once
+UFUNCS = {'add': numpy.add, 'subtract': numpy.subtract,
+          'multiply': numpy.multiply, 'divide': numpy.true_divide}
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        main_batch(sys.argv[2:])
+        return
+
     assert len(sys.argv) == 4, 'Need exactly 3 arguments'
 
     operator = sys.argv[1]
@@ -30,5 +42,84 @@ def do_arithmetic(operand1, operator, operand2):
     print(value)
 
 
+def main_batch(argv):
+    parser = argparse.ArgumentParser(
+        prog='arith.py --batch',
+        description='Apply an operator to many pairs of operands at once. '
+                    'With one file (or stdin), the operands are two of its '
+                    'comma-separated columns; with two files, they are '
+                    'every value of the first and second file, which must '
+                    'have the same shape.')
+    parser.add_argument('operator', choices=list(UFUNCS))
+    parser.add_argument('filenames', nargs='*', metavar='filename')
+    parser.add_argument('--columns', type=int, nargs=2, default=[0, 1],
+                        metavar=('I', 'J'),
+                        help='columns holding the first and second operands '
+                             'when reading one file (default: 0 1)')
+    parser.add_argument('--zero-division', choices=['inf', 'nan', 'error'],
+                        default='inf',
+                        help='what dividing by zero gives: +/-inf (or nan '
+                             'for 0/0), always nan, or an error '
+                             '(default: inf)')
+    # intermixed: filenames may come after --columns
+    args = parser.parse_intermixed_args(argv)
+    if len(args.filenames) > 2:
+        parser.error('Need at most 2 files')
+
+    try:
+        if len(args.filenames) == 2:
+            # ndmin=1: a file holding a single value is still an array
+            operand1 = numpy.loadtxt(args.filenames[0], delimiter=',',
+                                     ndmin=1)
+            operand2 = numpy.loadtxt(args.filenames[1], delimiter=',',
+                                     ndmin=1)
+        else:
+            source = args.filenames[0] if args.filenames else sys.stdin
+            pairs = numpy.loadtxt(source, delimiter=',', ndmin=2)
+    except ValueError:
+        print('Cannot convert input to a number: bailing out')
+        return
+
+    if len(args.filenames) < 2:
+        for column in args.columns:
+            if not 0 <= column < pairs.shape[1]:
+                parser.error('Column %d is out of range: the input has '
+                             '%d column(s)' % (column, pairs.shape[1]))
+        operand1 = pairs[:, args.columns[0]]
+        operand2 = pairs[:, args.columns[1]]
+
+    try:
+        values = do_arithmetic_batch(operand1, args.operator, operand2,
+                                     args.zero_division)
+    except (ValueError, ZeroDivisionError) as error:
+        print('%s: bailing out' % error)
+        return
+    inflammation_output.write(values)
+
+
+def do_arithmetic_batch(operand1, operator, operand2, zero_division='inf'):
+    """
+    apply operator to two arrays of operands element by element and
+    return the array of results; zero_division says what dividing by
+    zero gives: 'inf' (the IEEE +/-inf, or nan for 0/0), 'nan', or
+    'error' to raise ZeroDivisionError
+    """
+    operand1 = numpy.asarray(operand1, dtype=float)
+    operand2 = numpy.asarray(operand2, dtype=float)
+    if operand1.shape != operand2.shape:
+        raise ValueError('Operands have different shapes %s and %s'
+                         % (operand1.shape, operand2.shape))
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        values = UFUNCS[operator](operand1, operand2)
+    if operator == 'divide':
+        by_zero = operand2 == 0
+        if zero_division == 'error' and by_zero.any():
+            raise ZeroDivisionError('Division by zero')
+        if zero_division == 'nan':
+            values[by_zero] = numpy.nan
+    return values
+
+
 if __name__ == '__main__':
     main()
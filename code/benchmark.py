@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+
+"""
+Benchmark the analysis scripts in this directory on generated data.
+Execute `./benchmark.py --help` for more information.
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import importlib.util
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy
+
+import check
+import gen_inflammation
+import line_count
+import readings_fast
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIGURES_DIR = os.path.join(HERE, '..', 'fig')
+
+# command lines whose run time is dominated by interpreter start-up
+STARTUP = {
+    'readings_fast': ['readings_fast.py', '--help'],
+    'check': ['check.py', '--help'],
+    'line_count': ['line_count.py'],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Time the analysis scripts on a generated corpus and '
+                    'print the results as JSON.')
+    parser.add_argument('--files', type=int, default=10,
+                        help='number of files in the corpus (default: 10)')
+    parser.add_argument('--patients', type=int, default=1000,
+                        help='number of patients per file (default: 1000)')
+    parser.add_argument('--days', type=int, default=40,
+                        help='number of days per patient (default: 40)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed for the generated data (default: 0)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of timing runs, of which the fastest '
+                             'is reported (default: 3)')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS),
+                        help='run only these benchmarks')
+    parser.add_argument('--output', '-o', default='-',
+                        help='file to write the JSON to, or - for stdout '
+                             '(default)')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='inflammation-benchmark-')
+    try:
+        corpus = make_corpus(directory, args.files, args.patients,
+                             args.days, args.seed)
+        results = {
+            'python': sys.version.split()[0],
+            'numpy': numpy.__version__,
+            'corpus': {key: corpus[key] for key in
+                       ['files', 'patients', 'days', 'rows', 'bytes']},
+            'startup': {name: time_startup(command, args.repeat)
+                        for name, command in STARTUP.items()},
+            'benchmarks': {},
+        }
+        names = args.only or list(BENCHMARKS)
+        if importlib.util.find_spec('matplotlib') is None:
+            # generate_figures.py cannot run without Matplotlib
+            names = [name for name in names if name != 'figures']
+        for name in names:
+            # a fresh process for each benchmark keeps peak RSS separate
+            with concurrent.futures.ProcessPoolExecutor(1) as executor:
+                results['benchmarks'][name] = executor.submit(
+                    run, name, corpus, args.repeat).result()
+    finally:
+        shutil.rmtree(directory)
+
+    text = json.dumps(results, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+
+def make_corpus(directory, n_files, n_patients, n_days, seed):
+    """generate a corpus of data files in directory and describe it"""
+    seeds = numpy.random.SeedSequence(seed).spawn(n_files)
+    files = []
+    for number, file_seed in enumerate(seeds, start=1):
+        path = os.path.join(directory, gen_inflammation.DEFAULT_PATTERN
+                            % number)
+        files.append(gen_inflammation.generate_file(
+            path, file_seed, n_patients, n_days))
+    return {'directory': directory,
+            'paths': [f['file'] for f in files],
+            'files': n_files,
+            'patients': n_patients,
+            'days': n_days,
+            'rows': sum(f['rows'] for f in files),
+            'bytes': sum(f['bytes'] for f in files)}
+
+
+def time_startup(command, repeat):
+    """return the shortest wall time in seconds to run a script"""
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + command, cwd=HERE,
+                       stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(name, corpus, repeat):
+    """
+    time one benchmark over the corpus and return its fastest run time,
+    throughput and the peak resident memory of the process running it
+    """
+    benchmark = BENCHMARKS[name]
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        rows, size = benchmark(corpus)  # also warms up caches
+        times = []
+        for i in range(repeat):
+            start = time.perf_counter()
+            benchmark(corpus)
+            times.append(time.perf_counter() - start)
+    seconds = min(times)
+    return {'seconds': seconds,
+            'rows_per_second': rows / seconds,
+            'mb_per_second': size / seconds / 1e6,
+            'peak_rss_kb': peak_rss_kb()}
+
+
+def peak_rss_kb():
+    """return the peak resident memory of this process and its children"""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    if sys.platform == 'darwin':  # macOS reports bytes rather than KiB
+        peak //= 1024
+    return peak
+
+
+def bench_readings(corpus):
+    """readings_fast.process on every file, parsing the text each time"""
+    for path in corpus['paths']:
+        readings_fast.process(path, '--mean', use_cache=False)
+    return corpus['rows'], corpus['bytes']
+
+
+def bench_readings_cached(corpus):
+    """readings_fast.process on every file, loading from the .npy cache"""
+    for path in corpus['paths']:
+        readings_fast.process(path, '--mean')
+    return corpus['rows'], corpus['bytes']
+
+
+def bench_check(corpus):
+    """check.row_col_count on every file"""
+    for path in corpus['paths']:
+        check.row_col_count(path)
+    return corpus['rows'], corpus['bytes']
+
+
+def bench_line_count(corpus):
+    """line_count.count_file on every file"""
+    for path in corpus['paths']:
+        line_count.count_file(path)
+    return corpus['rows'], corpus['bytes']
+
+
+def bench_figures(corpus):
+    """every figure of fig/generate_figures.py rendered from the first file"""
+    # imported here: it needs Matplotlib, which the other benchmarks do not
+    if FIGURES_DIR not in sys.path:
+        sys.path.append(FIGURES_DIR)
+    import generate_figures
+
+    scratch = os.path.join(corpus['directory'], 'figures')
+    os.makedirs(scratch, exist_ok=True)
+    for figure in generate_figures.FIGURES:
+        generate_figures.render(figure, corpus['paths'][0], scratch)
+    return corpus['patients'], os.path.getsize(corpus['paths'][0])
+
+
+BENCHMARKS = {
+    'readings': bench_readings,
+    'readings_cached': bench_readings_cached,
+    'check': bench_check,
+    'line_count': bench_line_count,
+    'figures': bench_figures,
+}
+
+
+if __name__ == '__main__':
+    main()
@@ -1,34 +1,160 @@
+import argparse
+import concurrent.futures
+import functools
+import itertools
+import json
+import re
 import sys
-import numpy
+
+# read files in blocks of this many bytes when probing their shape
+CHUNK_SIZE = 1 << 20
+# the newline at the end of an empty line, which loadtxt would skip
+BLANK_LINE = re.compile(rb'(?<=\n)\r?\n')
 
 
 def main():
-    script = sys.argv[0]
-    filenames = sys.argv[1:]
-    if len(filenames) <= 1:  # nothing to check
+    parser = argparse.ArgumentParser(
+        description='Check that inflammation data files all have the same '
+                    'number of rows and columns as the first one.')
+    parser.add_argument('--strict', action='store_true',
+                        help='also check that every row of each file has '
+                             'the same number of columns')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='number of files to probe at the same time '
+                             '(default: 1)')
+    parser.add_argument('--fail-fast', action='store_true',
+                        help='stop at the first file that does not check')
+    parser.add_argument('--json', action='store_true',
+                        help='print a JSON summary of the mismatches '
+                             'instead of one line per file')
+    parser.add_argument('filenames', nargs='*')
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1: %d' % args.jobs)
+    filenames = args.filenames
+    if len(filenames) <= 1 and not args.json:  # nothing to check
         print('Only 1 file specified on input')
-    else:
-        nrow0, ncol0 = row_col_count(filenames[0])
-        print('First file %s: %d rows and %d columns' % (
-            filenames[0], nrow0, ncol0))
-        for filename in filenames[1:]:
-            nrow, ncol = row_col_count(filename)
-            if nrow != nrow0 or ncol != ncol0:
-                print('File %s does not check: %d rows and %d columns'
-                      % (filename, nrow, ncol))
-            else:
-                print('File %s checks' % filename)
         return
 
+    summary = check(filenames, args.strict, args.jobs, args.fail_fast,
+                    verbose=not args.json)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    if summary['mismatches']:
+        sys.exit(1)
+
+
+def check(filenames, strict=False, jobs=1, fail_fast=False, verbose=True):
+    """
+    compare the shape of every file with that of the first, probing up
+    to `jobs` files at a time, and return a summary of the mismatches;
+    with fail_fast=True, stop at the first file that does not check;
+    a file that cannot be read is a mismatch with an 'error', and if it
+    is the first file there is nothing to compare the others with
+    """
+    summary = {'first': None, 'checked': 0, 'mismatches': []}
+    if not filenames:
+        summary['complete'] = True
+        return summary
+    probe = functools.partial(probe_file, strict=strict)
+    with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+        # results come back in the same order as filenames
+        shapes = executor.map(probe, filenames)
+        for filename, (nrow, ncol, error) in zip(filenames, shapes):
+            summary['checked'] += 1
+            if error is not None:
+                if verbose:
+                    print('File %s cannot be read: %s' % (filename, error))
+                summary['mismatches'].append(
+                    {'file': filename, 'error': error})
+                if fail_fast or summary['first'] is None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+            elif summary['first'] is None:
+                nrow0, ncol0 = nrow, ncol
+                if verbose:
+                    print('First file %s: %d rows and %d columns' % (
+                        filename, nrow0, ncol0))
+                summary['first'] = {'file': filename,
+                                    'rows': nrow0, 'columns': ncol0}
+            elif nrow != nrow0 or ncol != ncol0:
+                if verbose:
+                    print('File %s does not check: %d rows and %d columns'
+                          % (filename, nrow, ncol))
+                summary['mismatches'].append(
+                    {'file': filename, 'rows': nrow, 'columns': ncol})
+                if fail_fast:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+            elif verbose:
+                print('File %s checks' % filename)
+    summary['complete'] = summary['checked'] == len(filenames)
+    return summary
 
-def row_col_count(filename):
+
+def probe_file(filename, strict=False):
+    """
+    return the number of rows and columns in a file and None, or
+    (0, 0, message) if the file cannot be read
+    """
     try:
-        nrow, ncol = numpy.loadtxt(filename, delimiter=',').shape
-    except ValueError:
-        # This occurs if the file doesn't have same number of rows and columns,
-        # or if it has non-numeric content
-        nrow, ncol = (0, 0)
-    return nrow, ncol
+        return row_col_count(filename, strict) + (None,)
+    except OSError as error:
+        return 0, 0, error.strerror
+
+
+def row_col_count(filename, strict=False):
+    """
+    return the number of rows and columns in a file without parsing it:
+    rows are counted from the newlines (skipping empty lines, as loadtxt
+    does) and columns from the commas on the first row; with strict=True,
+    a file whose rows do not all have the same number of columns gives
+    (0, 0)
+    """
+    nrow = 0
+    first_line = None
+    rest = b''  # the start of a line that continues in the next chunk
+    last = b'\n'
+    tail = b'\n'  # the end of the previous chunk, as if a line ended there
+    crlf = None  # whether lines end in \r\n, from the first line
+    commas = set()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            nrow += chunk.count(b'\n')
+            # blank lines are rare, so look for one before counting them;
+            # one may have started at the end of the previous chunk
+            if crlf is None and b'\n' in chunk:
+                crlf = b'\r\n' in tail + chunk
+            blank = b'\n\r\n' if crlf else b'\n\n'
+            if crlf is not None and (blank in chunk
+                                     or blank in tail + chunk[:2]):
+                nrow -= sum(1 for match in BLANK_LINE.finditer(tail + chunk)
+                            if match.end() > len(tail))
+            tail = (tail + chunk[-2:])[-2:]
+            last = chunk[-1:]
+            if first_line is None or strict:
+                lines = (rest + chunk).split(b'\n')
+                rest = lines.pop()
+                # the same lines as BLANK_LINE: a line of spaces is a row
+                lines = [line for line in lines if line not in (b'', b'\r')]
+                if first_line is None and lines:
+                    first_line = lines[0]
+                if strict:
+                    commas.update(map(bytes.count, lines,
+                                      itertools.repeat(b',')))
+    if last != b'\n':  # the last line has no newline at the end
+        nrow += 1
+        if first_line is None:
+            first_line = rest
+        if strict:
+            commas.add(rest.count(b','))
+
+    if nrow == 0 or first_line is None:
+        return 0, 0
+    if strict and len(commas) > 1:
+        # This occurs if the rows don't all have the same number of columns
+        return 0, 0
+    return nrow, first_line.count(b',') + 1
 
 
 if __name__ == '__main__':
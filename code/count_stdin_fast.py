@@ -0,0 +1,52 @@
+import argparse
+import sys
+
+# read standard input in blocks of this many bytes
+CHUNK_SIZE = 1 << 20
+# the bytes that separate words, as for bytes.split()
+WHITESPACE = b' \t\n\r\x0b\x0c'
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Count the lines in standard input, reading it in '
+                    'large blocks rather than line by line.')
+    parser.add_argument('--words', action='store_true',
+                        help='also count whitespace-separated words')
+    parser.add_argument('--bytes', action='store_true',
+                        help='also count bytes')
+    args = parser.parse_args()
+
+    lines, words, nbytes = count(sys.stdin.buffer, args.words)
+    print(lines, 'lines in standard input')
+    if args.words:
+        print(words, 'words in standard input')
+    if args.bytes:
+        print(nbytes, 'bytes in standard input')
+
+
+def count(stream, count_words=False):
+    """
+    return the number of lines, words and bytes in a binary stream,
+    reading it once in large blocks; words are only counted (and
+    otherwise returned as 0) if count_words is True
+    """
+    lines = words = nbytes = 0
+    last = b''
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        lines += chunk.count(b'\n')
+        nbytes += len(chunk)
+        if count_words:
+            words += len(chunk.split())
+            # a word split across two blocks has been counted twice
+            if (last and last not in WHITESPACE
+                    and chunk[:1] not in WHITESPACE):
+                words -= 1
+        last = chunk[-1:]
+    if last and last != b'\n':  # the last line has no newline at the end
+        lines += 1
+    return lines, words, nbytes
+
+
+if __name__ == '__main__':
+    main()
@@ -2,19 +2,142 @@
 
 """
 Generate pseudo-random patient inflammation data for use in Python lessons.
+Execute `./gen_inflammation.py --help` for more information.
 """
 
-import random
+import argparse
+import concurrent.futures
+import functools
+import hashlib
+import json
+import os
+import sys
+import numpy
 
-n_patients = 60
-n_days = 40
-n_range = 20
+# number of patients generated (and written) at a time, which bounds
+# memory use however many patients are asked for
+CHUNK_SIZE = 10000
+# file names used when generating several files without --output
+DEFAULT_PATTERN = 'inflammation-%05d.csv'
 
-middle = n_days / 2
 
-for p in range(n_patients):
-    vals = []
-    for d in range(n_days):
-        upper = max(n_range - abs(d - middle), 0)
-        vals.append(random.randint(upper/4, upper))
-    print(','.join([str(v) for v in vals]))
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate pseudo-random patient inflammation data.')
+    parser.add_argument('--patients', type=int, default=60,
+                        help='number of patients (rows) per file '
+                             '(default: 60)')
+    parser.add_argument('--days', type=int, default=40,
+                        help='number of days (columns) (default: 40)')
+    parser.add_argument('--range', type=int, default=20, dest='n_range',
+                        help='largest inflammation value, reached mid-way '
+                             'through the trial (default: 20)')
+    parser.add_argument('--seed', type=int,
+                        help='seed for the random numbers, to make the '
+                             'data reproducible')
+    parser.add_argument('--output', '-o', default='-',
+                        help='file to write to, or - for stdout (the '
+                             'default); with --files, a file name pattern '
+                             '(default: '
+                             + DEFAULT_PATTERN.replace('%', '%%') + ')')
+    parser.add_argument('--files', type=int, default=1,
+                        help='number of files to generate (default: 1)')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='number of worker processes writing files '
+                             '(default: 1)')
+    parser.add_argument('--manifest', metavar='PATH',
+                        help='where to write a JSON manifest of the files '
+                             'with their row counts and checksums (default: '
+                             'manifest.json next to the files when there '
+                             'are several of them)')
+    args = parser.parse_args()
+
+    if args.files > 1 and args.output == '-':
+        args.output = DEFAULT_PATTERN
+    if args.files > 1 and '%' not in args.output:
+        parser.error('--files needs an --output pattern such as '
+                     'inflammation-%02d.csv')
+    if args.files > 1 and args.manifest is None:
+        args.manifest = os.path.join(os.path.dirname(args.output),
+                                     'manifest.json')
+
+    # give every file its own, independent random stream, so that each
+    # file is the same however many workers write them
+    master = numpy.random.SeedSequence(args.seed)
+    seeds = master.spawn(args.files)
+    if args.files > 1:
+        paths = [args.output % number
+                 for number in range(1, args.files + 1)]
+    else:
+        paths = [args.output]
+    task = functools.partial(generate_file, n_patients=args.patients,
+                             n_days=args.days, n_range=args.n_range)
+    if args.jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(args.jobs) as executor:
+            files = list(executor.map(task, paths, seeds))
+    else:
+        files = list(map(task, paths, seeds))
+
+    if args.manifest:
+        manifest = {'seed': master.entropy,
+                    'patients': args.patients,
+                    'days': args.days,
+                    'range': args.n_range,
+                    'files': files}
+        with open(args.manifest, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.write('\n')
+
+
+def generate_file(path, seed=None, n_patients=60, n_days=40, n_range=20):
+    """
+    write one file of data to path (- for stdout) and return a description
+    of it with its number of rows, size in bytes and SHA-256 checksum
+    """
+    rng = numpy.random.default_rng(seed)
+    blocks = generate(n_patients, n_days, n_range, rng)
+    if path == '-':
+        return write(blocks, sys.stdout, path)
+    with open(path, 'w') as f:
+        return write(blocks, f, path)
+
+
+def generate(n_patients, n_days, n_range, rng):
+    """
+    yield arrays of data for at most CHUNK_SIZE patients at a time;
+    values rise towards n_range in the middle of the trial and fall off
+    again, each drawn between a quarter of that envelope and the envelope
+    """
+    middle = n_days / 2
+    days = numpy.arange(n_days)
+    upper = numpy.maximum(n_range - numpy.abs(days - middle), 0)
+    upper = upper.astype(numpy.int64)
+    lower = upper // 4
+
+    for start in range(0, n_patients, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, n_patients - start)
+        yield rng.integers(lower, upper, size=(size, n_days), endpoint=True)
+
+
+def write(blocks, stream, name='-'):
+    """
+    write blocks of data to stream as comma-separated integers and
+    return a description of what was written
+    """
+    rows = 0
+    size = 0
+    checksum = hashlib.sha256()
+    for block in blocks:
+        # one %-format over the whole block instead of one per value
+        line = ','.join(['%d'] * block.shape[1]) + '\n'
+        text = line * len(block) % tuple(block.ravel().tolist())
+        stream.write(text)
+        rows += len(block)
+        size += len(text)
+        checksum.update(text.encode('ascii'))
+    return {'file': name, 'rows': rows, 'bytes': size,
+            'sha256': checksum.hexdigest()}
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Combine statistics of inflammation data across many files.
+
+Each file is reduced to a small partial result -- count, sum, sum of
+squared deviations from the mean, minimum and maximum -- and partials
+are merged pairwise, so the whole corpus never has to be in memory at
+once. Standard deviations are merged with the parallel algorithm of
+Chan, Golub and LeVeque, which stays accurate for large counts.
+"""
+
+import numpy
+
+
+def partial(data, axis):
+    """return the partial statistics of data along axis (None for all)"""
+    data = numpy.asarray(data, dtype=float)
+    count = data.size if axis is None else data.shape[axis]
+    mean = numpy.mean(data, axis=axis, keepdims=True)
+    return {
+        'count': count,
+        'sum': numpy.sum(data, axis=axis),
+        'm2': numpy.sum((data - mean) ** 2, axis=axis),
+        'min': numpy.min(data, axis=axis),
+        'max': numpy.max(data, axis=axis),
+    }
+
+
+def merge(a, b):
+    """return the partial statistics of the data behind both a and b"""
+    if numpy.shape(a['sum']) != numpy.shape(b['sum']):
+        raise ValueError('Cannot merge statistics of shape %s and %s'
+                         % (numpy.shape(a['sum']), numpy.shape(b['sum'])))
+    count = a['count'] + b['count']
+    delta = b['sum'] / b['count'] - a['sum'] / a['count']
+    return {
+        'count': count,
+        'sum': a['sum'] + b['sum'],
+        'm2': a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / count,
+        'min': numpy.minimum(a['min'], b['min']),
+        'max': numpy.maximum(a['max'], b['max']),
+    }
+
+
+def finish(p, stat):
+    """return the statistic stat (min, mean, max or std) of partial p"""
+    if stat == 'min':
+        return p['min']
+    elif stat == 'mean':
+        return p['sum'] / p['count']
+    elif stat == 'max':
+        return p['max']
+    elif stat == 'std':
+        return numpy.sqrt(p['m2'] / p['count'])
+    raise ValueError('Statistic is not one of min, mean, max, std: ' + stat)
@@ -0,0 +1,101 @@
+"""
+Cache parsed inflammation data as binary .npy files.
+
+Each CSV file gets a sidecar in a `.inflammation-cache` directory next to
+it, named after the file's absolute path, size and modification time.
+Repeat runs memory-map the sidecar instead of parsing the text again;
+a sidecar is rebuilt only when the CSV it was made from has changed.
+"""
+
+import contextlib
+import glob
+import hashlib
+import os
+import tempfile
+import numpy
+
+import inflammation_csv
+
+CACHE_DIR = '.inflammation-cache'
+
+
+def load(filename, use_cache=True, rebuild=False):
+    """
+    return the data in filename as an array, using the cache if possible;
+    use_cache=False always parses the text, rebuild=True re-parses it
+    and replaces whatever is in the cache
+    """
+    if not use_cache:
+        return parse(filename)
+
+    cached = cache_path(filename)
+    if not rebuild and os.path.exists(cached):
+        try:
+            return numpy.load(cached, mmap_mode='r')
+        except (OSError, ValueError):
+            pass  # unreadable or damaged: parse the text and try to rewrite it
+
+    data = parse(filename)
+    store(filename, cached, data)
+    return data
+
+
+def parse(filename):
+    """parse a CSV file of inflammation data"""
+    return inflammation_csv.load(filename)
+
+
+def cache_path(filename):
+    """return the name of the sidecar that holds the parsed filename"""
+    stat = os.stat(filename)
+    return os.path.join(cache_dir(filename), '%s-%d-%d.npy' % (
+        path_key(filename), stat.st_size, stat.st_mtime_ns))
+
+
+def cache_dir(filename):
+    """return the cache directory used for filename"""
+    return os.path.join(os.path.dirname(os.path.abspath(filename)), CACHE_DIR)
+
+
+def path_key(filename):
+    """return a short key identifying filename by its absolute path"""
+    path = os.path.abspath(filename).encode('utf-8')
+    return hashlib.sha1(path).hexdigest()[:16]
+
+
+def store(filename, cached, data):
+    """
+    write data to the sidecar cached, removing stale sidecars of filename;
+    caching is skipped silently if the cache directory is not writable
+    """
+    directory = os.path.dirname(cached)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        for stale in glob.glob(os.path.join(directory,
+                                            path_key(filename) + '-*.npy')):
+            if stale != cached:
+                os.remove(stale)
+        # write to a temporary file first so that a concurrent reader
+        # never sees a half-written sidecar
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            # mkstemp creates the file readable by its owner only; give the
+            # sidecar the usual permissions so others sharing the data can
+            # read it too
+            os.chmod(tmp, 0o666 & ~umask())
+            with os.fdopen(fd, 'wb') as f:
+                numpy.save(f, data)
+            os.replace(tmp, cached)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+    except OSError:
+        pass
+
+
+def umask():
+    """return the process's file mode creation mask"""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
@@ -0,0 +1,88 @@
+"""
+Fast loader for inflammation CSV files.
+
+The data written by gen_inflammation.py are small non-negative integers
+separated by commas.  Rather than going through numpy.loadtxt, which
+parses every field as a general float, this module converts the raw
+bytes of a file with a handful of whole-array operations and returns
+the most compact unsigned integer type that holds the values.  Anything
+that does not fit that format is handed to numpy.loadtxt instead, so
+the result is always the same as loadtxt's, apart from the dtype.
+"""
+
+import io
+import numpy
+
+NEWLINE, ZERO = b'\n0'
+# longest field the fast path accepts; longer ones go to numpy.loadtxt
+MAX_DIGITS = 5
+
+
+def load(source):
+    """
+    return the data in source, which is either a filename or a file-like
+    object (such as sys.stdin), as an array
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            buffer = f.read()
+    else:
+        buffer = getattr(source, 'buffer', source).read()
+        if isinstance(buffer, str):
+            buffer = buffer.encode('utf-8')
+
+    data = parse(buffer)
+    if data is None:
+        # not in the compact integer format, so use the general parser
+        data = numpy.loadtxt(io.StringIO(buffer.decode('utf-8')),
+                             delimiter=',')
+    return data
+
+
+def parse(buffer):
+    """
+    parse a bytes-like buffer of comma-separated non-negative integers
+    into a uint8 or uint16 array, or return None if buffer is not in
+    that format
+    """
+    buffer = bytes(buffer)
+    if b'\r' in buffer:
+        buffer = buffer.replace(b'\r\n', b'\n')
+    if not buffer.endswith(b'\n'):
+        buffer += b'\n'
+    if buffer.translate(None, b'0123456789,\n'):
+        return None
+
+    # only digits, commas and newlines are left, and only digits are >= '0'
+    chars = numpy.frombuffer(buffer, dtype=numpy.uint8)
+    ends = numpy.flatnonzero(chars < ZERO)
+    lengths = numpy.diff(ends, prepend=-1) - 1
+    if lengths.min() == 0 or lengths.max() > MAX_DIGITS:
+        # empty fields (including blank lines) or very long numbers
+        return None
+
+    # every row must have as many fields as the first one
+    row_ends = chars[ends] == NEWLINE
+    nrows = numpy.count_nonzero(row_ends)
+    ncols = numpy.argmax(row_ends) + 1
+    if len(ends) != nrows * ncols or not numpy.all(row_ends[ncols - 1::ncols]):
+        return None
+
+    # start from the last digit of every field, then add in the tens,
+    # hundreds, ... of just those fields that are long enough to have them
+    digits = chars - numpy.uint8(ZERO)
+    values = digits[ends - 1].astype(numpy.uint32)
+    for i in range(1, lengths.max()):
+        longer = numpy.flatnonzero(lengths > i)
+        values[longer] += digits[ends[longer] - 1 - i] * numpy.uint32(10 ** i)
+
+    largest = values.max()
+    if largest <= numpy.iinfo(numpy.uint8).max:
+        values = values.astype(numpy.uint8)
+    elif largest <= numpy.iinfo(numpy.uint16).max:
+        values = values.astype(numpy.uint16)
+    else:
+        return None
+
+    # drop dimensions of length 1 the same way numpy.loadtxt does
+    return numpy.squeeze(values.reshape(nrows, ncols))
@@ -0,0 +1,57 @@
+"""
+Write arrays of results to a stream in one go.
+
+Formatting a whole array at once and handing it to the stream in a
+single write is much cheaper than calling print() for every value.
+"""
+
+import sys
+import numpy
+
+FORMATS = ['text', 'npy', 'bin']
+
+
+def write(values, output_format='text', precision=None, stream=None):
+    """
+    write values to stream (standard output by default) as
+        - text: one row per line with comma-separated columns, and
+          `precision` decimal places if given or the shortest exact
+          representation otherwise
+        - npy: a NumPy .npy float64 array, readable with numpy.load
+        - bin: raw little-endian float64
+    """
+    if stream is None:
+        stream = sys.stdout
+
+    if output_format == 'text':
+        stream.write(format_text(values, precision))
+    elif output_format in ['npy', 'bin']:
+        # text and binary writes must not overtake each other
+        stream.flush()
+        binary = getattr(stream, 'buffer', stream)
+        if output_format == 'npy':
+            numpy.save(binary, numpy.asarray(values, dtype='<f8'))
+        else:
+            binary.write(numpy.asarray(values, dtype='<f8').tobytes())
+        binary.flush()
+    else:
+        raise ValueError('Output format is not one of %s: %s'
+                         % (', '.join(FORMATS), output_format))
+
+
+def format_text(values, precision=None, delimiter=','):
+    """
+    return values formatted as a single string, one row per line
+    and the columns of a 2-D array separated by delimiter
+    """
+    values = numpy.asarray(values, dtype=float)
+    if values.size == 0:
+        return ''
+    ncol = 1 if values.ndim == 1 else values.shape[1]
+    if precision is None:
+        fmt = '%r'
+    else:
+        fmt = '%%.%df' % precision
+    # one %-format over the whole array instead of one per value
+    line = delimiter.join([fmt] * ncol) + '\n'
+    return line * (values.size // ncol) % tuple(values.ravel().tolist())
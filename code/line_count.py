@@ -1,38 +1,80 @@
+import argparse
+import concurrent.futures
+import mmap
+import os
 import sys
 
+# read files in blocks of this many bytes
+CHUNK_SIZE = 1 << 20
+# memory-map files at least this big instead of reading them
+MMAP_THRESHOLD = 64 << 20
+
 
 def main():
     """
     print each input filename and the number of lines in it,
     and print the sum of the number of lines
     """
-    filenames = sys.argv[1:]
+    parser = argparse.ArgumentParser(
+        description='Print the number of lines in each file and the total, '
+                    'or the number of lines in stdin if no filenames are '
+                    'given.')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='number of files to count at the same time '
+                             '(default: 1)')
+    parser.add_argument('filenames', nargs='*')
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1: %d' % args.jobs)
+    filenames = args.filenames
     sum_nlines = 0  # initialize counting variable
 
     if len(filenames) == 0:  # no filenames, just stdin
         sum_nlines = count_file_like(sys.stdin)
         print('stdin: %d' % sum_nlines)
     else:
-        for filename in filenames:
-            nlines = count_file(filename)
-            print('%s %d' % (filename, nlines))
-            sum_nlines += nlines
+        # threads overlap the waiting on I/O, and map() hands the counts
+        # back in the same order as filenames
+        with concurrent.futures.ThreadPoolExecutor(args.jobs) as executor:
+            for filename, nlines in zip(filenames,
+                                        executor.map(count_file, filenames)):
+                print('%s %d' % (filename, nlines))
+                sum_nlines += nlines
         print('total: %d' % sum_nlines)
 
 
 def count_file(filename):
     """count the number of lines in a file"""
-    f = open(filename, 'r')
-    nlines = len(f.readlines())
-    f.close()
-    return(nlines)
+    with open(filename, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            return count_chunks(iter(lambda: f.read(CHUNK_SIZE), b''))
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return count_chunks(m[start:start + CHUNK_SIZE]
+                                for start in range(0, size, CHUNK_SIZE))
 
 
 def count_file_like(file_like):
     """count the number of lines in a file-like object (eg stdin)"""
+    # read the underlying bytes, if there are any, to skip decoding
+    binary = getattr(file_like, 'buffer', file_like)
+    # read(0) gives the empty bytes (or str) that marks the end of input
+    return count_chunks(iter(lambda: binary.read(CHUNK_SIZE), binary.read(0)))
+
+
+def count_chunks(chunks):
+    """
+    count the number of lines in a sequence of blocks of bytes (or text),
+    including a last line that has no newline at the end
+    """
     n = 0
-    for line in file_like:
-        n = n+1
+    last = None
+    for chunk in chunks:
+        newline = b'\n' if isinstance(chunk, bytes) else '\n'
+        n += chunk.count(newline)
+        last = chunk[-1:]
+    if last and last != newline:
+        n += 1
     return n
 
 
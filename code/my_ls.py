@@ -1,18 +1,135 @@
-import glob
+import argparse
+import concurrent.futures
+import os
 import sys
+import time
 
 
 def main():
-    """prints names of all files with sys.argv as suffix"""
-    assert len(sys.argv) >= 2, "Argument list cannot be empty"
-    # NB: behaviour is not as you'd expect if sys.argv[1] is *
-    suffix = sys.argv[1]
-    glob_input = '*.' + suffix  # construct the input
-    glob_output = glob.glob(glob_input)  # call the glob function
-    for item in glob_output:  # print the output
-        print(item)
+    """prints names of all files with the given suffix"""
+    parser = argparse.ArgumentParser(
+        description='Print the names of all files with the given suffix.')
+    # NB: behaviour is not as you'd expect if the suffix is an unquoted *
+    parser.add_argument('suffix')
+    parser.add_argument('--recursive', '-r', action='store_true',
+                        help='look in subdirectories as well')
+    parser.add_argument('--sort', '-s', action='store_true',
+                        help='list each directory in order of name')
+    parser.add_argument('--long', '-l', action='store_true',
+                        help='also print the size and modification time')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='number of directories to scan at the same '
+                             'time when recursing (default: 1)')
+    parser.add_argument('directory', nargs='?', default='',
+                        help='where to start (default: current directory)')
+    args = parser.parse_args()
+
+    if args.recursive and args.jobs > 1:
+        found = walk_parallel(args.directory, args.suffix, args.sort,
+                              args.long, args.jobs)
+    else:
+        found = walk(args.directory, args.suffix, args.recursive, args.sort,
+                     args.long)
+    for path, stat in found:  # print the output as it is found
+        if args.long:
+            print('%12d %s %s' % (
+                stat.st_size,
+                time.strftime('%Y-%m-%d %H:%M', time.localtime(stat.st_mtime)),
+                path))
+        else:
+            print(path)
     return
 
 
+def walk(directory, suffix, recursive=False, sort=False, long=False):
+    """
+    yield (path, stat) for each file in directory whose name ends in
+    '.' + suffix, going depth-first into subdirectories if recursive;
+    stat is None unless long is True; unless sort is True, each is
+    yielded as soon as it is found
+    """
+    if sort:
+        matches, subdirectories = scan(directory, suffix, sort, long)
+        yield from matches
+    else:
+        subdirectories = []
+        yield from iter_scan(directory, suffix, long, subdirectories)
+    if recursive:
+        for subdirectory in subdirectories:
+            yield from walk(subdirectory, suffix, recursive, sort, long)
+
+
+def walk_parallel(directory, suffix, sort=False, long=False, jobs=2):
+    """
+    like walk(directory, suffix, recursive=True), but with subdirectories
+    scanned ahead in a pool of threads; results come out in the same order
+    """
+    with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+        pending = [executor.submit(scan, directory, suffix, sort, long)]
+        while pending:
+            matches, subdirectories = pending.pop().result()
+            yield from matches
+            # push in reverse so that the first subdirectory is next out
+            pending.extend(executor.submit(scan, subdirectory, suffix,
+                                           sort, long)
+                           for subdirectory in reversed(subdirectories))
+
+
+def scan(directory, suffix, sort=False, long=False):
+    """
+    return the matching (path, stat) pairs and the subdirectories of a
+    single directory; hidden entries are skipped, as glob does
+    """
+    subdirectories = []
+    matches = list(iter_scan(directory, suffix, long, subdirectories))
+    if sort:
+        matches.sort()
+        subdirectories.sort()
+    return matches, subdirectories
+
+
+def iter_scan(directory, suffix, long=False, subdirectories=None):
+    """
+    yield the matching (path, stat) pairs of a single directory as they
+    are found, appending its subdirectories to the list subdirectories;
+    a directory that cannot be read is reported and skipped, as find does
+    """
+    try:
+        entries = os.scandir(directory or os.curdir)
+    except OSError as error:
+        warn(error)
+        return
+    with entries:
+        try:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                path = os.path.join(directory, entry.name)
+                if entry.name.endswith('.' + suffix):
+                    yield path, stat(entry) if long else None
+                if (subdirectories is not None
+                        and entry.is_dir(follow_symlinks=False)):
+                    subdirectories.append(path)
+        except OSError as error:
+            warn(error)
+
+
+def stat(entry):
+    """
+    return the stat of a directory entry, or of the link itself for a
+    symbolic link whose target does not exist
+    """
+    try:
+        return entry.stat()
+    except OSError:
+        return entry.stat(follow_symlinks=False)
+
+
+def warn(error):
+    """print an error about a file or directory on standard error"""
+    print('%s: %s: %s' % (os.path.basename(sys.argv[0]), error.filename,
+                          error.strerror), file=sys.stderr)
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,209 @@
+import argparse
+import concurrent.futures
+import functools
+import sys
+import numpy
+
+import inflammation_aggregate
+import inflammation_cache
+import inflammation_csv
+import inflammation_output
+
+STATISTICS = ['min', 'mean', 'max', 'std']
+# the axis of the data that each --axis choice reduces along
+AXES = {'patient': 1, 'day': 0, 'all': None}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Print the minimum, mean or maximum inflammation '
+                    'of each patient (or day) in each file, or of stdin '
+                    'if no filenames are given.')
+    action = parser.add_mutually_exclusive_group()
+    for option in ['--min', '--mean', '--max']:
+        action.add_argument(option, dest='action', action='store_const',
+                            const=option)
+    action.add_argument('--stats', type=statistics,
+                        metavar='STAT[,STAT...]',
+                        help='print several statistics as columns, computed '
+                             'from a single read of each file; STAT is one '
+                             'of ' + ', '.join(STATISTICS))
+    # if no action is given, use the default action, that being mean
+    parser.set_defaults(action='--mean')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='always parse the CSV text, bypassing the cache')
+    parser.add_argument('--rebuild-cache', action='store_true',
+                        help='re-parse every file and refresh the cache')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='number of worker processes (default: 1)')
+    parser.add_argument('--output-format', choices=inflammation_output.FORMATS,
+                        default='text',
+                        help='how to write the results (default: text)')
+    parser.add_argument('--precision', type=int, metavar='DIGITS',
+                        help='number of decimal places in text output')
+    parser.add_argument('--stream', action='store_true',
+                        help='when reading stdin, print the result for each '
+                             'row as soon as it arrives')
+    parser.add_argument('--axis', choices=list(AXES), default='patient',
+                        help='compute one value per patient, per day, or for '
+                             'all the data (default: patient)')
+    parser.add_argument('--aggregate', action='store_true',
+                        help='combine all the files into one result instead '
+                             'of printing one per file (needs --axis day or '
+                             '--axis all)')
+    parser.add_argument('filenames', nargs='*')
+    args = parser.parse_args()
+    if args.stats:
+        args.action = args.stats
+    if args.precision is not None and args.precision < 0:
+        parser.error('--precision must not be negative: %d' % args.precision)
+    if args.stream and args.filenames:
+        parser.error('--stream only works on stdin, not on filenames')
+    if args.stream and args.axis != 'patient':
+        parser.error('--stream only works with --axis patient')
+    if args.aggregate and args.axis == 'patient':
+        parser.error('--aggregate needs --axis day or --axis all')
+    axis = AXES[args.axis]
+    output = {'output_format': args.output_format,
+              'precision': args.precision}
+
+    if len(args.filenames) == 0 and args.stream:
+        process_stream(sys.stdin, args.action, **output)
+    elif len(args.filenames) == 0:
+        process(sys.stdin, args.action, axis=axis, **output)
+    elif args.aggregate:
+        process_aggregate(args.filenames, args.action, axis, args.jobs,
+                          args.use_cache, args.rebuild_cache, **output)
+    elif args.jobs > 1:
+        process_parallel(args.filenames, args.action, args.jobs,
+                         args.use_cache, args.rebuild_cache, axis=axis,
+                         **output)
+    else:
+        for filename in args.filenames:
+            process(filename, args.action, args.use_cache, args.rebuild_cache,
+                    axis=axis, **output)
+
+def statistics(text):
+    """parse a comma-separated list of statistics for --stats"""
+    stats = text.split(',')
+    for stat in stats:
+        if stat not in STATISTICS:
+            raise argparse.ArgumentTypeError(
+                'Statistic is not one of %s: %s'
+                % (', '.join(STATISTICS), stat))
+    return stats
+
+def process(filename, action, use_cache=True, rebuild_cache=False,
+            output_format='text', precision=None, axis=1):
+    values = compute(filename, action, use_cache, rebuild_cache, axis=axis)
+    inflammation_output.write(values, output_format, precision)
+
+def process_parallel(filenames, action, jobs, use_cache=True,
+                     rebuild_cache=False, output_format='text',
+                     precision=None, axis=1):
+    """
+    compute the values for each file in a pool of worker processes,
+    printing them in the same order as filenames
+    """
+    task = functools.partial(compute, action=action, use_cache=use_cache,
+                             rebuild_cache=rebuild_cache, axis=axis)
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        for values in executor.map(task, filenames,
+                                   chunksize=chunksize(filenames, jobs)):
+            inflammation_output.write(values, output_format, precision)
+
+def process_aggregate(filenames, action, axis, jobs=1, use_cache=True,
+                      rebuild_cache=False, output_format='text',
+                      precision=None):
+    """
+    print the values of action along axis over all the files together,
+    merging the statistics of one file at a time
+    """
+    task = functools.partial(partial_stats, axis=axis, use_cache=use_cache,
+                             rebuild_cache=rebuild_cache)
+    if jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+            # merge in argument order so the result is the same every run
+            total = functools.reduce(
+                inflammation_aggregate.merge,
+                executor.map(task, filenames,
+                             chunksize=chunksize(filenames, jobs)))
+    else:
+        total = functools.reduce(inflammation_aggregate.merge,
+                                 map(task, filenames))
+
+    if isinstance(action, list):
+        values = numpy.column_stack(
+            [inflammation_aggregate.finish(total, stat) for stat in action])
+    else:
+        values = inflammation_aggregate.finish(total, action[2:])
+    inflammation_output.write(numpy.atleast_1d(values), output_format,
+                              precision)
+
+def chunksize(filenames, jobs):
+    """
+    return how many files to hand to a worker at a time, so that pickling
+    overhead stays small compared to the work done on each batch
+    """
+    return max(1, min(64, len(filenames) // (jobs * 4)))
+
+def process_stream(file_like, action, output_format='text', precision=None):
+    """
+    reduce and print each row of file_like as soon as it has been read,
+    so that an unbounded pipe is processed in constant memory
+    """
+    for line in file_like:
+        if not line.strip():
+            continue
+        row = numpy.array(line.split(','), dtype=float)
+        values = summarize(row[numpy.newaxis, :], action)
+        inflammation_output.write(values, output_format, precision)
+        sys.stdout.flush()
+
+def compute(filename, action, use_cache=True, rebuild_cache=False, axis=1):
+    """return the values of action along axis for one file"""
+    data = load(filename, use_cache, rebuild_cache)
+    return summarize(data, action, axis)
+
+def partial_stats(filename, axis, use_cache=True, rebuild_cache=False):
+    """return the partial statistics along axis for one file"""
+    data = load(filename, use_cache, rebuild_cache)
+    return inflammation_aggregate.partial(data, axis)
+
+def load(filename, use_cache=True, rebuild_cache=False):
+    """
+    return the data in filename, or in a file-like object, with one row
+    per patient even if there is only one patient
+    """
+    if isinstance(filename, str):
+        data = inflammation_cache.load(filename, use_cache, rebuild_cache)
+    else:
+        # a file-like object such as stdin cannot be cached
+        data = inflammation_csv.load(filename)
+    return numpy.atleast_2d(data)
+
+def summarize(data, action, axis=1):
+    """
+    return the values of action along axis (1 for one value per patient)
+    for an array of data; if action is a list of statistics there is one
+    column for each
+    """
+    if isinstance(action, list):
+        return numpy.column_stack([summarize(data, '--' + stat, axis)
+                                   for stat in action])
+
+    if action == '--min':
+        values = numpy.min(data, axis=axis)
+    elif action == '--mean':
+        values = numpy.mean(data, axis=axis)
+    elif action == '--max':
+        values = numpy.max(data, axis=axis)
+    elif action == '--std':
+        values = numpy.std(data, axis=axis)
+
+    # copy out of any memory-mapped cache file before returning, as float
+    # so that min and max of compact cached data are not uint8 or uint16
+    return numpy.atleast_1d(numpy.array(values, dtype=float))
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,53 @@
+import numpy
+
+
 def rectangle_area(coords):
     x0, y0, x1, y1 = coords
-    return (x1 - x0) * (x1 - y0)
+    return (x1 - x0) * (y1 - y0)
+
+
+def rectangle_areas(rects):
+    """
+    return the areas of many rectangles at once, given as an (N, 4) array
+    whose rows are (x0, y0, x1, y1), the lower left and upper right corners
+    """
+    x0, y0, x1, y1 = check_rectangles(rects).T
+    return (x1 - x0) * (y1 - y0)
+
+
+def normalize_rectangles(rects):
+    """
+    Normalizes many rectangles at once, as normalize_rectangle in the
+    defensive programming episode does for one: each is moved to the
+    origin and scaled to be 1.0 units long on its longest axis.
+    Input is an (N, 4) array whose rows are (x0, y0, x1, y1);
+    the result is an (N, 4) array of (0, 0, upper_x, upper_y).
+    """
+    x0, y0, x1, y1 = check_rectangles(rects).T
+
+    dx = x1 - x0
+    dy = y1 - y0
+    longest = numpy.maximum(dx, dy)
+    upper_x = dx / longest
+    upper_y = dy / longest
+
+    assert numpy.all((0 < upper_x) & (upper_x <= 1.0)), \
+        'Calculated upper X coordinate invalid'
+    assert numpy.all((0 < upper_y) & (upper_y <= 1.0)), \
+        'Calculated upper Y coordinate invalid'
+
+    zeros = numpy.zeros_like(upper_x)
+    return numpy.column_stack([zeros, zeros, upper_x, upper_y])
+
+
+def check_rectangles(rects):
+    """
+    check that rects is an (N, 4) array of rectangles whose corners are
+    in the right order, and return it as an array of floats
+    """
+    rects = numpy.asarray(rects, dtype=float)
+    assert rects.ndim == 2 and rects.shape[1] == 4, \
+        'Rectangles must contain 4 coordinates'
+    assert numpy.all(rects[:, 0] < rects[:, 2]), 'Invalid X coordinates'
+    assert numpy.all(rects[:, 1] < rects[:, 3]), 'Invalid Y coordinates'
+    return rects
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import check
+
+
+class TestRowColCount(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def count(self, text, strict=False):
+        filename = os.path.join(self.directory, 'data.csv')
+        with open(filename, 'wb') as f:
+            f.write(text)
+        return check.row_col_count(filename, strict)
+
+    def assertCounts(self, cases, strict=False):
+        # small chunks make blank lines and \r\n straddle chunk boundaries
+        for chunk_size in [1, 2, 3, 4, 5, 1 << 20]:
+            for text, expected in cases:
+                with self.subTest(text=text, chunk_size=chunk_size,
+                                  strict=strict):
+                    with unittest.mock.patch.object(check, 'CHUNK_SIZE',
+                                                    chunk_size):
+                        self.assertEqual(self.count(text, strict), expected)
+
+    def test_blank_lines_are_not_rows(self):
+        cases = [
+            (b'1,2\n3,4\n', (2, 2)),
+            (b'1,2\n\n3,4\n', (2, 2)),
+            (b'\n\n1,2,3\n\n\n4,5,6', (2, 3)),
+            (b'1,2\r\n\r\n3,4\r\n', (2, 2)),
+            (b'\r\n1,2\r\n\r\n\r\n3,4', (2, 2)),
+            (b'', (0, 0)),
+            (b'\n\r\n\n', (0, 0)),
+        ]
+        self.assertCounts(cases)
+        self.assertCounts(cases, strict=True)
+
+    def test_lines_of_spaces_are_rows(self):
+        self.assertCounts([(b'1,2\n   \n3,4\n', (3, 2)),
+                           (b'1,2\r\n \t\r\n3,4', (3, 2))])
+        self.assertCounts([(b'1,2\n   \n3,4\n', (0, 0)),
+                           (b'1,2\r\n \t\r\n3,4', (0, 0))], strict=True)
+
+    def test_strict_rows_must_match(self):
+        self.assertCounts([(b'1,2\n3\n', (2, 2))])
+        self.assertCounts([(b'1,2\n3\n', (0, 0)),
+                           (b'1,2\n\n3,4', (2, 2))], strict=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
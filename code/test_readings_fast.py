@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import readings_fast
+
+
+class TestOnePatient(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.one = os.path.join(self.directory, 'one.csv')
+        with open(self.one, 'w') as f:
+            f.write('1,2,3\n')
+        self.many = os.path.join(self.directory, 'many.csv')
+        with open(self.many, 'w') as f:
+            f.write('3,4,5\n5,6,7\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def aggregate(self, filenames, action, axis):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            readings_fast.process_aggregate(filenames, action, axis)
+        return output.getvalue()
+
+    def test_one_patient_has_one_value(self):
+        for use_cache in [False, True, True]:  # parse, store, then load
+            with self.subTest(use_cache=use_cache):
+                values = readings_fast.compute(self.one, '--mean', use_cache)
+                numpy.testing.assert_array_equal(values, [2.0])
+
+    def test_one_patient_per_day(self):
+        for use_cache in [False, True, True]:
+            with self.subTest(use_cache=use_cache):
+                values = readings_fast.compute(self.one, '--mean', use_cache,
+                                               axis=0)
+                numpy.testing.assert_array_equal(values, [1.0, 2.0, 3.0])
+
+    def test_one_patient_from_stdin(self):
+        values = readings_fast.compute(io.StringIO('1,2,3\n'), '--max',
+                                       axis=0)
+        numpy.testing.assert_array_equal(values, [1.0, 2.0, 3.0])
+
+    def test_aggregate_one_patient_per_day(self):
+        self.assertEqual(self.aggregate([self.one], '--mean', 0),
+                         '1.0\n2.0\n3.0\n')
+
+    def test_aggregate_one_patient_with_many(self):
+        self.assertEqual(self.aggregate([self.one, self.many], '--mean', 0),
+                         '3.0\n4.0\n5.0\n')
+        self.assertEqual(self.aggregate([self.many, self.one], '--min', None),
+                         '1.0\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,22 @@
 #!/usr/bin/env python3
 """
 Generate figures used in the lesson episodes.
-Usage: ./generate_figures.py
+Execute `./generate_figures.py --help` for more information.
 """
 
+import argparse
+import concurrent.futures
+import hashlib
+import inspect
+import json
+import os
+import sys
+
 try:
     import numpy
+    import matplotlib
+    # render straight to files: no display is needed, in any process
+    matplotlib.use('Agg')
     import matplotlib.pyplot
 except ImportError:
     print("Failed to load NumPy and/or Matplotlib", file=sys.stderr)
@@ -15,65 +26,210 @@ except ImportError:
 # All settings: matplotlib.rcParams or matplotlib.pyplot.rcParams
 matplotlib.pyplot.rcParams['svg.fonttype'] = 'none'
 
-# Load data
-data = numpy.loadtxt(fname="../data/inflammation-01.csv", delimiter=",")
+DEFAULT_DATA = "../data/inflammation-01.csv"
+# Records what each SVG in the output directory was rendered from
+CACHE_FILE = ".figure-cache.json"
+
 
 # Episode 1
 ## Visualizing data
 
-matplotlib.pyplot.imshow(data)
-matplotlib.pyplot.savefig("inflammation-01-imshow.svg")
-matplotlib.pyplot.close()
+def plot_imshow(data, filename):
+    matplotlib.pyplot.imshow(data)
+    matplotlib.pyplot.savefig(filename)
+    matplotlib.pyplot.close()
 
-matplotlib.pyplot.plot(numpy.mean(data, axis=0))
-matplotlib.pyplot.savefig("inflammation-01-average.svg")
-matplotlib.pyplot.close()
 
-matplotlib.pyplot.plot(numpy.max(data, axis=0))
-matplotlib.pyplot.savefig("inflammation-01-maximum.svg")
-matplotlib.pyplot.close()
+def plot_average(data, filename):
+    matplotlib.pyplot.plot(numpy.mean(data, axis=0))
+    matplotlib.pyplot.savefig(filename)
+    matplotlib.pyplot.close()
 
-matplotlib.pyplot.plot(numpy.min(data, axis=0))
-matplotlib.pyplot.savefig("inflammation-01-minimum.svg")
-matplotlib.pyplot.close()
 
-## Grouping plots
-fig = matplotlib.pyplot.figure(figsize=(10.0, 3.0))
+def plot_maximum(data, filename):
+    matplotlib.pyplot.plot(numpy.max(data, axis=0))
+    matplotlib.pyplot.savefig(filename)
+    matplotlib.pyplot.close()
 
-axes1 = fig.add_subplot(1, 3, 1)
-axes2 = fig.add_subplot(1, 3, 2)
-axes3 = fig.add_subplot(1, 3, 3)
 
-axes1.set_ylabel('average')
-axes1.plot(numpy.mean(data, axis=0))
+def plot_minimum(data, filename):
+    matplotlib.pyplot.plot(numpy.min(data, axis=0))
+    matplotlib.pyplot.savefig(filename)
+    matplotlib.pyplot.close()
 
-axes2.set_ylabel('max')
-axes2.plot(numpy.max(data, axis=0))
 
-axes3.set_ylabel('min')
-axes3.plot(numpy.min(data, axis=0))
+## Grouping plots
 
-fig.tight_layout()
-matplotlib.pyplot.savefig("inflammation-01-group-plot.svg")
-matplotlib.pyplot.close(fig)
+def plot_group(data, filename):
+    fig = matplotlib.pyplot.figure(figsize=(10.0, 3.0))
 
+    axes1 = fig.add_subplot(1, 3, 1)
+    axes2 = fig.add_subplot(1, 3, 2)
+    axes3 = fig.add_subplot(1, 3, 3)
 
-## Exercise: Drawing Straight Lines
-fig = matplotlib.pyplot.figure(figsize=(10.0, 3.0))
+    axes1.set_ylabel('average')
+    axes1.plot(numpy.mean(data, axis=0))
+
+    axes2.set_ylabel('max')
+    axes2.plot(numpy.max(data, axis=0))
 
-axes1 = fig.add_subplot(1, 3, 1)
-axes2 = fig.add_subplot(1, 3, 2)
-axes3 = fig.add_subplot(1, 3, 3)
+    axes3.set_ylabel('min')
+    axes3.plot(numpy.min(data, axis=0))
 
-axes1.set_ylabel('average')
-axes1.plot(numpy.mean(data, axis=0), drawstyle='steps-mid')
+    fig.tight_layout()
+    matplotlib.pyplot.savefig(filename)
+    matplotlib.pyplot.close(fig)
 
-axes2.set_ylabel('max')
-axes2.plot(numpy.max(data, axis=0), drawstyle='steps-mid')
 
-axes3.set_ylabel('min')
-axes3.plot(numpy.min(data, axis=0), drawstyle='steps-mid')
+## Exercise: Drawing Straight Lines
 
-fig.tight_layout()
-matplotlib.pyplot.savefig("inflammation-01-line-styles.svg")
-matplotlib.pyplot.close(fig)
+def plot_line_styles(data, filename):
+    fig = matplotlib.pyplot.figure(figsize=(10.0, 3.0))
+
+    axes1 = fig.add_subplot(1, 3, 1)
+    axes2 = fig.add_subplot(1, 3, 2)
+    axes3 = fig.add_subplot(1, 3, 3)
+
+    axes1.set_ylabel('average')
+    axes1.plot(numpy.mean(data, axis=0), drawstyle='steps-mid')
+
+    axes2.set_ylabel('max')
+    axes2.plot(numpy.max(data, axis=0), drawstyle='steps-mid')
+
+    axes3.set_ylabel('min')
+    axes3.plot(numpy.min(data, axis=0), drawstyle='steps-mid')
+
+    fig.tight_layout()
+    matplotlib.pyplot.savefig(filename)
+    matplotlib.pyplot.close(fig)
+
+
+# Each figure is saved as <data file name>-<figure name>.svg (see svg_name)
+FIGURES = {
+    'imshow': plot_imshow,
+    'average': plot_average,
+    'maximum': plot_maximum,
+    'minimum': plot_minimum,
+    'group-plot': plot_group,
+    'line-styles': plot_line_styles,
+}
+
+
+def render(figure, data_file, output_dir='.'):
+    """Render one figure from one data file and return the SVG's name."""
+    data = numpy.loadtxt(fname=data_file, delimiter=",")
+    filename = os.path.join(output_dir, svg_name(figure, data_file))
+    FIGURES[figure](data, filename)
+    return filename
+
+
+def svg_name(figure, data_file):
+    """Return the name of the SVG file of one figure of one data file."""
+    stem = os.path.splitext(os.path.basename(data_file))[0]
+    return f"{stem}-{figure}.svg"
+
+
+def figure_key(figure, data_file):
+    """
+    Return a hash of everything a figure depends on: the data file's
+    contents, the code that draws the figure, and the Matplotlib version
+    and settings.
+    """
+    key = hashlib.sha256()
+    with open(data_file, 'rb') as infile:
+        key.update(infile.read())
+    key.update(inspect.getsource(FIGURES[figure]).encode())
+    key.update(inspect.getsource(render).encode())
+    key.update(matplotlib.__version__.encode())
+    key.update(matplotlib.pyplot.rcParams['svg.fonttype'].encode())
+    return key.hexdigest()
+
+
+def load_cache(output_dir):
+    """Return the build cache of output_dir, or an empty one."""
+    try:
+        with open(os.path.join(output_dir, CACHE_FILE)) as infile:
+            return json.load(infile)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(output_dir, cache):
+    """Write the build cache of output_dir."""
+    with open(os.path.join(output_dir, CACHE_FILE), 'w') as outfile:
+        json.dump(cache, outfile, indent=2, sort_keys=True)
+        outfile.write('\n')
+
+
+if __name__ == '__main__':
+
+    description = """
+    Generate the lesson's figures from inflammation data files.
+    """
+
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-j', '--jobs', type=int, default=1, metavar='N',
+                        help="Number of figures to render at the same time.")
+    parser.add_argument('-d', '--output-dir', default='.',
+                        help="Directory to write the SVG files to.")
+    parser.add_argument('-f', '--figure', action='append',
+                        choices=list(FIGURES), dest='figures',
+                        help="Figure to render (may be repeated; "
+                             "default: all of them).")
+    parser.add_argument('--force', action='store_true',
+                        help="Render every figure, even if it is up to date.")
+    parser.add_argument('files', metavar='data_file', nargs='*',
+                        default=[DEFAULT_DATA],
+                        help=f"Data file(s) to plot (default: {DEFAULT_DATA}).")
+    args = parser.parse_args()
+
+    # SVGs are named after the data file's stem, so two different files
+    # with the same stem would overwrite each other's figures
+    stems = {}
+    for data_file in args.files:
+        stem = os.path.splitext(os.path.basename(data_file))[0]
+        other = stems.setdefault(stem, data_file)
+        if os.path.realpath(other) != os.path.realpath(data_file):
+            parser.error(f"{other} and {data_file} would both be "
+                         f"saved as {stem}-<figure>.svg")
+    args.files = list(dict.fromkeys(stems.values()))
+
+    try:
+        os.makedirs(args.output_dir, exist_ok=True)
+    except OSError as error:
+        parser.error(f"cannot create output directory: {error}")
+
+    # Every figure of every file is an independent job
+    jobs = [(figure, data_file)
+            for data_file in args.files
+            for figure in args.figures or FIGURES]
+
+    # Skip figures whose SVG exists and was rendered from the same inputs
+    cache = load_cache(args.output_dir)
+    keys = {}
+    todo = []
+    for figure, data_file in jobs:
+        name = svg_name(figure, data_file)
+        keys[name] = figure_key(figure, data_file)
+        up_to_date = (cache.get(name) == keys[name] and
+                      os.path.isfile(os.path.join(args.output_dir, name)))
+        if args.force or not up_to_date:
+            todo.append((figure, data_file))
+
+    figures = [figure for figure, data_file in todo]
+    data_files = [data_file for figure, data_file in todo]
+    output_dirs = [args.output_dir] * len(todo)
+    if args.jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(args.jobs) as executor:
+            rendered = list(executor.map(render, figures, data_files,
+                                         output_dirs))
+    else:
+        rendered = list(map(render, figures, data_files, output_dirs))
+
+    for filename in rendered:
+        name = os.path.basename(filename)
+        cache[name] = keys[name]
+    save_cache(args.output_dir, cache)
+
+    print(f"{len(jobs) - len(todo)} figure(s) up to date, "
+          f"{len(rendered)} rendered")
@@ -6,10 +6,61 @@ Execute `./optimize_svg.py --help` for more information.
 
 from pathlib import Path
 import argparse
+import concurrent.futures
+import functools
+import hashlib
+import inspect
+import json
+import os
 import re
+import shutil
 import subprocess
 import sys
-
+import tempfile
+import time
+import xml.etree.ElementTree
+
+# Records the optimized contents of the SVG files in each directory
+CACHE_FILE = ".svg-cache.json"
+
+# Size of the blocks SVG files are cleaned up in (see cleanup_file)
+CHUNK_SIZE = 1 << 20
+
+# Removed from SVG files by manual_cleanup
+TEXT_TO_REMOVE = [
+        # Matplotlib's default font
+        'font-family="DejaVu Sans"',
+        # Default stroke width of 1.0 is good enough
+        'stroke-width=".8"'
+        ]
+# Each pattern starts with a fixed character, which lets the
+# regular expression they are compiled into skip quickly over the rest
+PATTERNS_TO_REMOVE = [
+        # useless rotations (by 0 degrees), with the space before them
+        r' transform="rotate\(-?0 .+?\)"',
+        # the DOCTYPE declaration, which Matplotlib spreads over two lines,
+        # with the line break before it (or after it, at the very start)
+        r'\n<!DOCTYPE[^>]*>',
+        r'<!DOCTYPE[^>]*>\n?',
+        # empty lines
+        r'\n(?=\n)',
+        ]
+
+# Path data, whose coordinates manual_cleanup can round
+PATH_DATA = r' d="[^"]*"'
+NUMBER = re.compile(r'-?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?')
+
+# Options used with SVGO (see optimize_with_svgo)
+SVGO_COMMAND = [
+        "svgo",
+        "--multipass",
+        "--pretty",
+        "--indent=2",
+        "--enable={sortAttrs,removeStyleElement,removeScriptElement,removeOffCanvasPaths}"
+        ]
+
+
+@functools.lru_cache(maxsize=None)
 def detect_optimizers():
     """
     Detect available SVG optimizers.
@@ -17,13 +68,14 @@ def detect_optimizers():
         - svgcleaner
         - svgo
         - scour
+    The result is cached, so the optimizers are only probed once per run.
     """
     available_optimizers = []
 
     # Check if we have svgcleaner
     command = ["svgcleaner", "--version"]
-    process = subprocess.run(command, capture_output=True)
-    if not process.stderr:
+    process = probe(command)
+    if process and not process.stderr:
         available_optimizers.append('svgcleaner')
         output = process.stdout.decode("ascii").split()
         if __name__ == '__main__':
@@ -31,8 +83,8 @@ def detect_optimizers():
 
     # Check if we have svgo
     command = ["svgo", "--version"]
-    process = subprocess.run(command, capture_output=True)
-    if not process.stderr:
+    process = probe(command)
+    if process and not process.stderr:
         available_optimizers.append('svgo')
         output = process.stdout.decode("ascii").split()
         if __name__ == '__main__':
@@ -48,7 +100,15 @@ def detect_optimizers():
         if __name__ == '__main__':
             print("Found 'scour' version", scour.__version__)
 
-    return available_optimizers
+    return tuple(available_optimizers)
+
+
+def probe(command):
+    """Run a command; return the completed process, or None if it is missing."""
+    try:
+        return subprocess.run(command, capture_output=True)
+    except OSError:
+        return None
 
 
 def select_optimizer(choice):
@@ -57,6 +117,7 @@ def select_optimizer(choice):
     Allowed choices:
         - auto
         - all
+        - best (all of them, keeping the smallest output; see race)
         - svgo (if available)
         - svgcleaner (if available)
         - scour (if available)
@@ -64,7 +125,7 @@ def select_optimizer(choice):
 
     possible = ['svgcleaner', 'svgo', 'scour']
     available = detect_optimizers()
-    allowed = ["auto", "all"] + available
+    allowed = ["auto", "all", "best"] + list(available)
 
     if choice not in allowed:
         print(f"Selected optimizer ({choice}) is not available.", file=sys.stderr)
@@ -75,8 +136,8 @@ def select_optimizer(choice):
             optimizer = [available[0]]
         else:
             optimizer = []
-    elif choice == 'all':
-        optimizer = available
+    elif choice in ('all', 'best'):
+        optimizer = list(available)
     else:
         optimizer = [choice]
 
@@ -84,24 +145,52 @@ def select_optimizer(choice):
 
 ### Functions
 
-def optimize(optimizer, files):
-    """Optimize (SVG) files using specified optimizer."""
+def optimize(optimizer, files, jobs=1):
+    """
+    Optimize (SVG) files using specified optimizer.
+    Returns a list of (file, error message) for files that failed.
+    """
 
     if optimizer == 'svgcleaner':
-        optimize_with_svgcleaner(files)
+        return optimize_with_svgcleaner(files, jobs)
 
     if optimizer == 'svgo':
-        optimize_with_svgo(files)
+        return optimize_with_svgo(files, jobs)
 
     if optimizer == 'scour':
-        optimize_with_scour(files)
+        return optimize_with_scour(files, jobs)
 
+    return []
 
-def optimize_with_scour(files):
-    from scour import scour
+
+def run_jobs(function, files, jobs=1):
+    """
+    Apply function to each file, in a pool of `jobs` worker processes if
+    there is more than one, and collect the failures.
+    `function` returns an error message, or None on success.
+    Returns a list of (file, error message) in the order of files.
+    """
+    if jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+            errors = list(executor.map(function, files))
+    else:
+        errors = list(map(function, files))
+    return [(file, error) for file, error in zip(files, errors) if error]
+
+
+def optimize_with_scour(files, jobs=1):
     """
     Optimize SVG files using Scour.
     """
+    return run_jobs(scour_file, files, jobs)
+
+
+def scour_file(file):
+    """
+    Optimize a single SVG file using Scour.
+    Returns an error message, or None on success.
+    """
+    from scour import scour
 
     # Configure scour
     options = scour.parse_args()
@@ -126,28 +215,25 @@ def optimize_with_scour(files):
     options.remove_descriptive_elements = True
     options.quiet = True
 
-    for file in files:
-        options.infilename = file
-        options.outfilename = file[:-4] + "-scoured.svg"
-
-        try:
-            # .start will close the files. Weird flex but ok
-            with open(file, 'rb') as infile, open(options.outfilename, 'wb') as outfile:
-                scour.start(options, infile, outfile)
-        except FileNotFoundError:
-            # Doing this because we have a list of
-            # hard-coded file names
-            print(f"File {file} not found")
-        except:
-            print("Failed to optimize:", file)
-            if not infile.closed: infile.close()
-            if not outfile.closed: outfile.close()
-            if Path(options.outfilename).is_file():
-                Path(options.outfilename).unlink()
-        else:
-            Path(options.outfilename).rename(file)
+    options.infilename = file
+    options.outfilename = file[:-4] + "-scoured.svg"
 
-def optimize_with_svgcleaner(files):
+    try:
+        # .start will close the files. Weird flex but ok
+        with open(file, 'rb') as infile, open(options.outfilename, 'wb') as outfile:
+            scour.start(options, infile, outfile)
+    except FileNotFoundError:
+        # Doing this because we have a list of
+        # hard-coded file names
+        return "File not found"
+    except Exception as error:
+        if Path(options.outfilename).is_file():
+            Path(options.outfilename).unlink()
+        return f"Scour failed: {error}"
+    else:
+        Path(options.outfilename).rename(file)
+
+def optimize_with_svgcleaner(files, jobs=1):
     """
     Optimize SVG files using SVGcleaner.
     Used options:
@@ -158,6 +244,14 @@ def optimize_with_svgcleaner(files):
         - properties-precision 1
         - paths-coordinates-precision 1
     """
+    return run_jobs(svgcleaner_file, files, jobs)
+
+
+def svgcleaner_file(file):
+    """
+    Optimize a single SVG file using SVGcleaner.
+    Returns an error message, or None on success.
+    """
     basic_command = [
             "svgcleaner",
             "--indent", "2",
@@ -167,22 +261,20 @@ def optimize_with_svgcleaner(files):
             "--properties-precision", "1",
             "--paths-coordinates-precision", "1"
             ]
-    for file in files:
-        output_file = file[:-4] + "-svgcleaned.svg"
-        command = basic_command + [file, output_file]
-        process = subprocess.run(command, capture_output=True)
-        if process.returncode:
-            error_stream = process.stderr.decode("ascii")
-            if not re.match(r'Your image is .+? smaller now.', error_stream):
-                print(f"Failed to optimize '{file}' with SVGcleaner:", file=sys.stderr)
-                print(error_stream, file=sys.stderr)
-                if Path(output_file).is_file():
-                    Path(output_file).unlink()
-        else:
+    output_file = file[:-4] + "-svgcleaned.svg"
+    command = basic_command + [file, output_file]
+    process = subprocess.run(command, capture_output=True)
+    if process.returncode:
+        error_stream = process.stderr.decode("ascii")
+        if not re.match(r'Your image is .+? smaller now.', error_stream):
             if Path(output_file).is_file():
-                Path(output_file).rename(file)
+                Path(output_file).unlink()
+            return f"SVGcleaner failed: {error_stream.strip()}"
+    else:
+        if Path(output_file).is_file():
+            Path(output_file).rename(file)
 
-def optimize_with_svgo(files):
+def optimize_with_svgo(files, jobs=1):
     """
     Optimize SVG files using SVGO.
     Uses the following options:
@@ -194,65 +286,381 @@ def optimize_with_svgo(files):
             * removeStyleElement
             * removeScriptElement
             * removeOffCanvasPaths
+    Starting Node.js takes longer than optimizing a small file, so files are
+    passed to SVGO in batches, as many as the command line allows,
+    split over `jobs` processes running at the same time.
     """
-    basic_command = [
-            "svgo",
-            "--multipass",
-            "--pretty",
-            "--indent=2",
-            "--enable={sortAttrs,removeStyleElement,removeScriptElement,removeOffCanvasPaths}"
-            ]
-    for file in files:
-        output_file = file[:-4] + "-svgo.svg"
-        command = basic_command + ["-i", file, "-o", output_file]
-        process = subprocess.run(command, capture_output=True)
-        if process.returncode:
-            print(f"Failed to optimize '{file}' with SVGO", file=sys.stderr)
-            print(process.stderr.decode("ascii"), file=sys.stderr)
-            if Path(output_file).is_file():
-                Path(output_file).unlink()
-        else:
+    def cost(file):
+        # an input and an output file for each
+        return argument_size([file, file[:-4] + "-svgo.svg"])
+
+    budget = argument_budget() - argument_size(SVGO_COMMAND + ["-i", "-o"])
+    batches = make_batches(files, cost, budget, jobs)
+    with concurrent.futures.ThreadPoolExecutor(max(jobs, 1)) as executor:
+        errors = [error
+                  for batch_errors in executor.map(svgo_batch, batches)
+                  for error in batch_errors]
+    return [(file, error) for file, error in zip(files, errors) if error]
+
+
+def svgo_batch(files):
+    """
+    Optimize several SVG files using a single SVGO process.
+    If SVGO fails, the batch is split in two and each half retried,
+    to find out which files failed, and why.
+    Returns a list of error messages (None on success), one for each file.
+    """
+    output_files = [file[:-4] + "-svgo.svg" for file in files]
+    command = SVGO_COMMAND + ["-i"] + files + ["-o"] + output_files
+    process = subprocess.run(command, capture_output=True)
+    if not process.returncode:
+        for file, output_file in zip(files, output_files):
             if Path(output_file).is_file():
                 Path(output_file).rename(file)
+        return [None] * len(files)
+
+    for output_file in output_files:
+        if Path(output_file).is_file():
+            Path(output_file).unlink()
+    if len(files) == 1:
+        return [f"SVGO failed: {process.stderr.decode('ascii').strip()}"]
+    middle = len(files) // 2
+    return svgo_batch(files[:middle]) + svgo_batch(files[middle:])
+
 
+def svgo_file(file):
+    """
+    Optimize a single SVG file using SVGO.
+    Returns an error message, or None on success.
+    """
+    output_file = file[:-4] + "-svgo.svg"
+    command = SVGO_COMMAND + ["-i", file, "-o", output_file]
+    process = subprocess.run(command, capture_output=True)
+    if process.returncode:
+        if Path(output_file).is_file():
+            Path(output_file).unlink()
+        return f"SVGO failed: {process.stderr.decode('ascii').strip()}"
+    else:
+        if Path(output_file).is_file():
+            Path(output_file).rename(file)
 
-def manual_cleanup(files):
+
+def argument_budget():
+    """
+    Return how many bytes of command-line arguments a process can be
+    started with, leaving room for the environment and to spare.
+    """
+    try:
+        limit = os.sysconf('SC_ARG_MAX')
+    except (AttributeError, ValueError, OSError):
+        # Windows: the command line is limited to 32767 characters
+        limit = 32767
+    environment = argument_size(f"{name}={value}"
+                                for name, value in os.environ.items())
+    return max((limit - environment) // 2, 4096)
+
+
+def argument_size(arguments):
+    """
+    Return the number of bytes that arguments take up on a command line:
+    each is a null-terminated string, plus a pointer to it.
+    """
+    return sum(len(os.fsencode(argument)) + 1 + 8 for argument in arguments)
+
+
+def make_batches(files, cost, budget, parts=1):
+    """
+    Split files into batches, each to be given to a single process:
+    the `cost` of the files in a batch adds up to no more than budget
+    (though a batch always has at least one file), and there are at least
+    `parts` batches if there are enough files.
+    Returns a list of lists of files, in the order of files.
+    """
+    most = max(1, -(-len(files) // max(parts, 1)))
+    batches = []
+    batch = []
+    size = 0
+    for file in files:
+        file_cost = cost(file)
+        if batch and (size + file_cost > budget or len(batch) >= most):
+            batches.append(batch)
+            batch = []
+            size = 0
+        batch.append(file)
+        size += file_cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def manual_cleanup(files, jobs=1, precision=None):
     """
     Remove junk settings from SVG files generated with Matplotlib.
     Currently removes:
         - font-family="DejaVu Sans"
         - stroke-width=".8"
         - transform="rotate(-0 ...)"
+        - the DOCTYPE declaration
+        - empty lines
+    With precision, the coordinates in path data are also rounded
+    to that many decimal places.
+    Returns a list of (file, error message) for files that failed.
     """
-    text_to_remove = [
-            # Matplotlib's default font
-            'font-family="DejaVu Sans"',
-            # Default stroke width of 1.0 is good enough
-            'stroke-width=".8"'
-            ]
+    return run_jobs(functools.partial(cleanup_file, precision=precision),
+                    files, jobs)
 
-    patterns_to_remove = [
-            # useless rotations (by 0 degrees)
-            r'\s*transform="rotate\(-?0 .+?\)"',
-            ]
 
-    for file in files:
-        output_file = file[:-4] + "-cleaned.svg"
-        try:
-            with open(file, "r") as infile, open(output_file, "w") as outfile:
-                for line in infile:
-                    if line.startswith("<!DOCTYPE"): continue
-                    for txt in text_to_remove: line = line.replace(txt, "")
-                    for pat in patterns_to_remove: line = re.sub(pat, "", line)
-                    if line == '\n': continue
-                    outfile.write(line)
-        except:
-            print("Failed to clean up:", file)
-            if Path(output_file).is_file():
-                Path(output_file).unlink()
+def cleanup_file(file, precision=None):
+    """
+    Remove junk settings from a single SVG file (see manual_cleanup).
+    The file is read in large blocks, each cleaned up in a single pass.
+    Returns an error message, or None on success.
+    """
+    clean = cleanup_engine(precision)
+    output_file = file[:-4] + "-cleaned.svg"
+    try:
+        with open(file, "r") as infile, open(output_file, "w") as outfile:
+            pending = ""
+            for block in iter(lambda: infile.read(CHUNK_SIZE), ""):
+                pending += block
+                # Only clean up to the end of the last tag that ends a line,
+                # so that nothing to remove is split between two blocks
+                end = pending.rfind(">\n") + 1
+                if end:
+                    outfile.write(clean(pending[:end]))
+                    pending = pending[end:]
+            outfile.write(clean(pending))
+    except Exception as error:
+        if Path(output_file).is_file():
+            Path(output_file).unlink()
+        return f"Failed to clean up: {error}"
+    else:
+        if Path(output_file).is_file():
+            Path(output_file).rename(file)
+
+
+@functools.lru_cache(maxsize=None)
+def cleanup_engine(precision=None):
+    """
+    Compile everything manual_cleanup does into a single regular expression.
+    Returns a function that cleans up a piece of an SVG file.
+    """
+    removals = [re.escape(text) for text in TEXT_TO_REMOVE] + PATTERNS_TO_REMOVE
+    if precision is None:
+        return functools.partial(re.compile("|".join(removals)).sub, "")
+
+    # Path data is rounded rather than removed
+    regex = re.compile(f"(?P<path>{PATH_DATA})|" + "|".join(removals))
+    round_path = functools.partial(round_numbers, digits=precision)
+
+    def replace(match):
+        if match.lastgroup == 'path':
+            return round_path(match)
+        return ""
+
+    return functools.partial(regex.sub, replace)
+
+
+def round_numbers(match, digits):
+    """
+    Return the text of match, with its numbers rounded.
+    Optimizers write path data without separators where they can
+    ("M1.5-.02.5"), so a number that loses its sign or leading "."
+    is separated from the one before it by a space.
+    """
+    def round_number(number):
+        text = f"{float(number.group()):.{digits}f}"
+        if "." in text:
+            text = text.rstrip("0").rstrip(".")
+        if text == "-0":
+            text = "0"
+        before = number.string[number.start() - 1:number.start()]
+        if text[0] != "-" and before and before in "0123456789.":
+            text = " " + text
+        return text
+
+    return NUMBER.sub(round_number, match.group())
+
+
+# Function optimizing a single file, for each optimizer
+OPTIMIZERS = {
+        'svgcleaner': svgcleaner_file,
+        'svgo': svgo_file,
+        'scour': scour_file,
+        }
+
+
+def race(files, optimizers, jobs=1):
+    """
+    Optimize SVG files with every one of optimizers and keep the smallest
+    result (see race_file), in a pool of `jobs` worker processes if there
+    is more than one.
+    Returns a list of the results of race_file, in the order of files.
+    """
+    function = functools.partial(race_file, optimizers=optimizers)
+    if jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+            return list(executor.map(function, files))
+    return list(map(function, files))
+
+
+def race_file(file, optimizers):
+    """
+    Run each of optimizers on its own temporary copy of a single SVG file,
+    all at the same time, and replace the file with the smallest output
+    that is still valid XML, if that is smaller than the file itself.
+    Returns a dict of:
+        - file
+        - winner: the optimizer with the smallest output (None if all failed
+          or none made the file smaller)
+        - original: the size of the file before, in bytes
+        - size: the size of the file after, in bytes
+        - seconds: the wall time of each optimizer
+        - errors: the error message of each optimizer that failed
+    """
+    result = {'file': file, 'winner': None, 'original': None, 'size': None,
+              'seconds': {}, 'errors': {}}
+    try:
+        result['original'] = result['size'] = Path(file).stat().st_size
+    except OSError as error:
+        result['errors']['best'] = f"Failed to read: {error}"
+        return result
+
+    # Copies go next to the file, so that the winner can be renamed over it
+    copies = {}
+    try:
+        for optimizer in optimizers:
+            handle, copies[optimizer] = tempfile.mkstemp(
+                    suffix='.svg', prefix=f"{Path(file).stem}-{optimizer}-",
+                    dir=Path(file).parent)
+            os.close(handle)
+            shutil.copyfile(file, copies[optimizer])
+
+        # The optimizers are separate programs (or release the GIL while
+        # doing I/O), so threads are enough to run them at the same time
+        functions = [OPTIMIZERS[optimizer] for optimizer in optimizers]
+        with concurrent.futures.ThreadPoolExecutor(len(optimizers) or 1) as executor:
+            timings = list(executor.map(timed, functions, copies.values()))
+
+        sizes = {}
+        for optimizer, (error, seconds) in zip(optimizers, timings):
+            result['seconds'][optimizer] = seconds
+            if error is None:
+                error = validate(copies[optimizer])
+            if error is None:
+                sizes[optimizer] = Path(copies[optimizer]).stat().st_size
+            else:
+                result['errors'][optimizer] = error
+
+        # Keep the original if no optimizer improved on it
+        winner = min(sizes, key=sizes.get, default=None)
+        if winner is not None and sizes[winner] < result['original']:
+            os.replace(copies.pop(winner), file)
+            result['winner'] = winner
+            result['size'] = sizes[winner]
+    finally:
+        for copy in copies.values():
+            if Path(copy).is_file():
+                Path(copy).unlink()
+    return result
+
+
+def timed(function, file):
+    """Return the result of function(file) and its wall time in seconds."""
+    start = time.perf_counter()
+    error = function(file)
+    return error, time.perf_counter() - start
+
+
+def validate(file):
+    """
+    Check that an optimized SVG file is still valid XML.
+    Returns an error message, or None if it is valid.
+    """
+    try:
+        xml.etree.ElementTree.parse(file)
+    except xml.etree.ElementTree.ParseError as error:
+        return f"Invalid output: {error}"
+
+
+def print_summary(results):
+    """
+    Print a table of which optimizer won for each file,
+    how much smaller it made it and how long it took.
+    """
+    header = ("file", "winner", "before", "after", "reduction", "time (s)")
+    rows = []
+    for result in results:
+        winner = result['winner']
+        if winner is None:
+            continue
+        if result['original']:
+            reduction = 1 - result['size'] / result['original']
         else:
-            if Path(output_file).is_file():
-                Path(output_file).rename(file)
+            reduction = 0
+        rows.append((result['file'], winner, str(result['original']),
+                     str(result['size']), f"{reduction:.1%}",
+                     f"{result['seconds'][winner]:.3f}"))
+    if not rows:
+        return
+
+    widths = [max(len(row[column]) for row in rows + [header])
+              for column in range(len(header))]
+    # Left-align the names, right-align the numbers
+    template = "  ".join(["{:<%d}" % width for width in widths[:2]] +
+                         ["{:>%d}" % width for width in widths[2:]])
+    print(template.format(*header))
+    for row in rows:
+        print(template.format(*row))
+
+
+def settings_key(optimizers, best=False, precision=None):
+    """
+    Return a hash of the settings files are optimized with:
+    the optimizers used, in order, and the code that runs each of them
+    and the manual clean-up (which includes their options).
+    With best, the optimizers are raced (see race_file) rather than run in turn.
+    With precision, the clean-up rounds path data (see cleanup_engine).
+    """
+    key = hashlib.sha256()
+    if best:
+        key.update(inspect.getsource(race_file).encode())
+    for optimizer in optimizers:
+        key.update(optimizer.encode())
+        key.update(inspect.getsource(OPTIMIZERS[optimizer]).encode())
+    key.update(repr(SVGO_COMMAND).encode())
+    key.update(inspect.getsource(cleanup_file).encode())
+    key.update(inspect.getsource(cleanup_engine).encode())
+    key.update(repr([TEXT_TO_REMOVE, PATTERNS_TO_REMOVE]).encode())
+    if precision is not None:
+        key.update(inspect.getsource(round_numbers).encode())
+        key.update(repr([PATH_DATA, NUMBER.pattern, precision]).encode())
+    return key.hexdigest()
+
+
+def file_hash(file):
+    """Return a hash of the contents of a file, or None if it is missing."""
+    try:
+        with open(file, 'rb') as infile:
+            return hashlib.sha256(infile.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def load_cache(directory):
+    """Return the optimization cache of directory, or an empty one."""
+    try:
+        with open(Path(directory, CACHE_FILE)) as infile:
+            return json.load(infile)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(directory, cache):
+    """Write the optimization cache of directory."""
+    with open(Path(directory, CACHE_FILE), 'w') as outfile:
+        json.dump(cache, outfile, indent=2, sort_keys=True)
+        outfile.write('\n')
 
 
 if __name__ == '__main__':
@@ -264,18 +672,79 @@ if __name__ == '__main__':
     # Specify permissible command-line arguments and parse them
     parser = argparse.ArgumentParser(description=description)
     parser.add_argument('-o', metavar="optimizer",
-                        help="An optimizer to use. Options: svgcleaner, svgo, scour, auto, all",
-                        choices=['svgcleaner', 'svgo', 'scour', 'auto', 'all'],
+                        help="An optimizer to use. Options: svgcleaner, svgo, scour, auto, all, best",
+                        choices=['svgcleaner', 'svgo', 'scour', 'auto', 'all', 'best'],
                         default='auto')
+    parser.add_argument('-j', '--jobs', type=int, default=1, metavar='N',
+                        help="Number of files to optimize at the same time.")
+    parser.add_argument('-p', '--precision', type=int, metavar='N',
+                        help="Round the coordinates in path data to N decimal places "
+                             "(useful when no optimizer is installed).")
+    parser.add_argument('--force', action='store_true',
+                        help="Optimize every file, even if it already has been.")
     parser.add_argument('files',
                         metavar='svg_file',
                         help="SVG file(s) to optimize.", nargs='+')
     args = parser.parse_args()
     sys.argv = [''] # scour uses OptParse which processes OUR args! argh!
 
-
-    for opt in select_optimizer(args.o):
-        print("Optimizing using:", opt)
-        optimize(opt, args.files)
-
-    manual_cleanup(args.files)
+    optimizers = select_optimizer(args.o)
+    best = args.o == 'best'
+    key = settings_key(optimizers, best, args.precision)
+
+    # Skip files that are unchanged since they were last optimized with the
+    # same settings, according to the cache in their directory
+    caches = {}
+    todo = []
+    for file in args.files:
+        path = Path(file)
+        if path.parent not in caches:
+            caches[path.parent] = load_cache(path.parent)
+        done = caches[path.parent].get(path.name, {}).get(key)
+        if args.force or done is None or done != file_hash(file):
+            todo.append(file)
+
+    # (file, step, error message) for everything that went wrong
+    failures = []
+
+    if best:
+        # Race the optimizers on each file
+        print("Optimizing using the best of:", ", ".join(optimizers))
+        results = race(todo, optimizers, args.jobs)
+        for result in results:
+            # Only a file that no optimizer managed to optimize has failed;
+            # one that none could make smaller is left as it is
+            succeeded = set(result['seconds']) - set(result['errors'])
+            if result['winner'] is None and result['errors'] and not succeeded:
+                error = "; ".join(f"{opt}: {error}"
+                                  for opt, error in result['errors'].items())
+                failures.append((result['file'], 'best', error))
+    else:
+        for opt in optimizers:
+            print("Optimizing using:", opt)
+            for file, error in optimize(opt, todo, args.jobs):
+                failures.append((file, opt, error))
+
+    for file, error in manual_cleanup(todo, args.jobs, args.precision):
+        failures.append((file, 'cleanup', error))
+
+    failed = {file for file, step, error in failures}
+    for file in todo:
+        if file not in failed:
+            path = Path(file)
+            entry = caches[path.parent].setdefault(path.name, {})
+            entry[key] = file_hash(file)
+    for directory, cache in caches.items():
+        if cache:
+            save_cache(directory, cache)
+
+    if best:
+        print_summary(results)
+    print(f"{len(args.files) - len(todo)} file(s) up to date (cache hits), "
+          f"{len(todo)} optimized (cache misses)")
+
+    if failures:
+        print(f"{len(failures)} failure(s):", file=sys.stderr)
+        for file, step, error in failures:
+            print(f"  {file} ({step}): {error}", file=sys.stderr)
+        sys.exit(1)
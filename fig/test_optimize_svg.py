@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import optimize_svg
+
+
+def numbers(path):
+    """Split path data into its numbers, as an SVG renderer would."""
+    return [float(number) for number in
+            re.findall(r'-?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?', path)]
+
+
+class TestRoundPathData(unittest.TestCase):
+    def clean(self, path, precision):
+        return optimize_svg.cleanup_engine(precision)(f' d="{path}"')[4:-1]
+
+    def test_spaced_path_data(self):
+        self.assertEqual(self.clean("M 57.6 307.584 \nL 414.72 -0.04 \n", 1),
+                         "M 57.6 307.6 \nL 414.7 0 \n")
+
+    def test_compact_path_data_keeps_its_numbers_apart(self):
+        # as written by svgo and svgcleaner: signs and dots separate numbers
+        cases = [
+            ("M1.5-0.02L3.25 4.75", 1, [1.5, 0, 3.2, 4.8]),
+            ("M1.5-.02", 1, [1.5, 0]),
+            ("M.5.5", 0, [0, 0]),
+            ("M1.25.5-.25", 1, [1.2, 0.5, -0.2]),
+            ("M10-2.04.5", 1, [10, -2, 0.5]),
+            ("M1e-3.25 10", 1, [0, 0.2, 10]),
+        ]
+        for path, precision, expected in cases:
+            with self.subTest(path=path, precision=precision):
+                self.assertEqual(numbers(self.clean(path, precision)),
+                                 expected)
+
+    def test_other_text_is_left_alone(self):
+        text = '<rect x="1.23456" width="2.5"/>'
+        self.assertEqual(optimize_svg.cleanup_engine(1)(text), text)
+
+
+def rewrite(text):
+    """Return a fake optimizer that replaces a file's contents with text."""
+    def optimizer(file):
+        with open(file, 'w') as outfile:
+            outfile.write(text)
+    return optimizer
+
+
+class TestRaceFile(unittest.TestCase):
+    ORIGINAL = '<svg>  <g/>  </svg>'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file = os.path.join(self.directory, 'figure.svg')
+        with open(self.file, 'w') as outfile:
+            outfile.write(self.ORIGINAL)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def race(self, optimizers):
+        with unittest.mock.patch.dict(optimize_svg.OPTIMIZERS, optimizers):
+            result = optimize_svg.race_file(self.file, list(optimizers))
+        with open(self.file) as infile:
+            return result, infile.read()
+
+    def test_smallest_output_wins(self):
+        result, text = self.race({'small': rewrite('<svg/>'),
+                                  'big': rewrite('<svg><g/></svg>')})
+        self.assertEqual(result['winner'], 'small')
+        self.assertEqual(text, '<svg/>')
+        self.assertEqual(os.listdir(self.directory), ['figure.svg'])
+
+    def test_original_is_kept_if_nothing_is_smaller(self):
+        bigger = '<svg>   <g/>   <g/>   </svg>'
+        result, text = self.race({'big': rewrite(bigger),
+                                  'broken': rewrite('<svg')})
+        self.assertIsNone(result['winner'])
+        self.assertEqual(result['size'], result['original'])
+        self.assertEqual(text, self.ORIGINAL)
+        self.assertEqual(os.listdir(self.directory), ['figure.svg'])
+
+
+if __name__ == "__main__":
+    unittest.main()